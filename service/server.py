@@ -6,19 +6,27 @@ Provides RESTful API for Go client
 """
 
 import json
+import os
 import time
 import sys
-import traceback
+import hashlib
+import logging
+import functools
+import concurrent.futures
 from aiohttp import web
 import asyncio
 from typing import Dict, List, Any, Optional
 
+# Tracebacks are logged server-side only; responses carry just the error code
+logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+log = logging.getLogger(__name__)
+
 # Pre-load PyThaiNLP modules at startup
 print("Loading PyThaiNLP modules...", file=sys.stderr)
 start_time = time.time()
 
 try:
-    from pythainlp.tokenize import word_tokenize, syllable_tokenize
+    from pythainlp.tokenize import word_tokenize, syllable_tokenize, sent_tokenize
     from pythainlp.transliterate import romanize, transliterate, pronunciate
     from pythainlp import __version__ as pythainlp_version
     
@@ -122,41 +130,453 @@ print(f"Available romanizers: {ROMANIZE_ENGINES}", file=sys.stderr)
 print(f"Available transliterators: {TRANSLITERATE_ENGINES}", file=sys.stderr)
 print(f"Available syllable engines: {SYLLABLE_ENGINES}", file=sys.stderr)
 
+# Prefer the Rust-backed nlpo3 tokenizer when importable; it is a drop-in
+# replacement for newmm with equivalent segmentations at a fraction of the cost
+DEFAULT_TOKENIZE_ENGINE = "newmm"
+if "nlpo3" in TOKENIZE_ENGINES:
+    try:
+        # First call loads the default dictionary into the Rust tokenizer
+        _ = word_tokenize("ทดสอบ", engine="nlpo3")
+        DEFAULT_TOKENIZE_ENGINE = "nlpo3"
+    except Exception as e:
+        print(f"nlpo3 warmup failed ({e}) - keeping newmm as default", file=sys.stderr)
+print(f"Default tokenize engine: {DEFAULT_TOKENIZE_ENGINE}", file=sys.stderr)
+
+
+# Tune the ONNXRuntime sessions PyThaiNLP builds for thai2rom_onnx. The
+# engine creates its InferenceSessions lazily with default options and no
+# way to pass our own, so the constructor is wrapped to supply tuned
+# SessionOptions (full graph optimization, bounded intra-op threads) to any
+# session created without explicit ones. The warmup below then forces
+# creation, so all requests share the one warm, optimized session
+try:
+    import onnxruntime as _ort
+
+    _ort_inference_session = _ort.InferenceSession
+
+    # Opt-in INT8 weights for the ONNX engines: dynamic quantization
+    # halves memory traffic and roughly doubles CPU throughput on VNNI
+    # hardware, at a typically sub-1% accuracy cost. Off by default
+    INT8_MODELS = os.environ.get("THAI2ROM_INT8", "0") == "1"
+
+    def _int8_variant(model_path: str) -> str:
+        """Return the INT8 sibling of an ONNX model, quantizing on first use"""
+        int8_path = model_path[:-len(".onnx")] + ".int8.onnx"
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantize_dynamic(model_path, int8_path,
+                             weight_type=QuantType.QInt8)
+            print(f"Quantized {os.path.basename(model_path)} to INT8",
+                  file=sys.stderr)
+        return int8_path
+
+    class _TunedInferenceSession(_ort_inference_session):
+        """InferenceSession with tuned defaults for sessions created
+        without explicit options
+
+        A subclass (rather than a wrapper function) keeps isinstance and
+        subclass checks against ort.InferenceSession working for other
+        libraries in the container.
+        """
+
+        def __init__(self, model, *args, **kwargs):
+            # Scope the swap to thai2rom models: other libraries in the
+            # full image (e.g. wtpsplit) create sessions through this
+            # same constructor and must keep their FP32 weights
+            if (INT8_MODELS and isinstance(model, str)
+                    and "thai2rom" in model.lower()
+                    and model.endswith(".onnx")
+                    and not model.endswith(".int8.onnx")):
+                try:
+                    model = _int8_variant(model)
+                except Exception as e:
+                    print(f"INT8 quantization failed for {model}: {e} "
+                          f"- using FP32 model", file=sys.stderr)
+            # Callers passing sess_options positionally land in args;
+            # only inject defaults when no options were given either way
+            if not args and kwargs.get("sess_options") is None:
+                so = _ort.SessionOptions()
+                so.graph_optimization_level = \
+                    _ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                so.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+                so.inter_op_num_threads = 1
+                kwargs["sess_options"] = so
+            super().__init__(model, *args, **kwargs)
+
+    _ort.InferenceSession = _TunedInferenceSession
+except ImportError:
+    pass
+
+
+def warmup_engines() -> None:
+    """Pre-load every detected engine so first requests skip cold-start
+
+    Neural engines pay multi-second model/session loads on first use;
+    doing it here keeps that out of request handlers. The loads are
+    independent, so they run on a small thread pool. Engines that fail
+    to warm stay in the registry and surface their error on first use.
+    """
+    start = time.time()
+
+    def warm(func, engine, **kwargs):
+        try:
+            func("ทดสอบ", engine=engine, **kwargs)
+        except Exception as e:
+            print(f"Warmup failed for {func.__name__}/{engine}: {e}",
+                  file=sys.stderr)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+        for e in TOKENIZE_ENGINES:
+            pool.submit(warm, word_tokenize, e)
+        for e in ROMANIZE_ENGINES:
+            pool.submit(warm, romanize, e)
+        for e in TRANSLITERATE_ENGINES:
+            pool.submit(warm, transliterate, e)
+        for e in SYLLABLE_ENGINES:
+            pool.submit(warm, syllable_tokenize, e)
+
+    print(f"Engine warmup done in {time.time() - start:.1f}s", file=sys.stderr)
+
+
+# Direct engine entry points for the hot tokenize path. The word_tokenize
+# wrapper re-resolves the engine and normalizes options on every call, which
+# dwarfs the segmentation itself for short strings; these call the
+# underlying segment functions directly when no options are given
+TOKENIZERS: Dict[str, Any] = {}
+try:
+    from pythainlp.tokenize.newmm import segment as _newmm_segment
+    TOKENIZERS["newmm"] = _newmm_segment
+except ImportError:
+    pass
+try:
+    from pythainlp.tokenize.longest import segment as _longest_segment
+    TOKENIZERS["longest"] = _longest_segment
+except ImportError:
+    pass
+if "nlpo3" in TOKENIZE_ENGINES:
+    try:
+        from pythainlp.tokenize.nlpo3 import segment as _nlpo3_segment
+        TOKENIZERS["nlpo3"] = _nlpo3_segment
+    except ImportError:
+        pass
+
+# word_tokenize applies join_broken_num=True by default, rejoining
+# numbers/decimals the raw segmenters split; the fast path must do the
+# same or numeric output changes client-visibly. Disable the fast path
+# entirely if the helper moves in a future PyThaiNLP
+try:
+    from pythainlp.tokenize._utils import rejoin_formatted_num
+except ImportError:
+    rejoin_formatted_num = None
+    TOKENIZERS.clear()
+
+
+def _word_tokenize_direct(text: str, engine: str,
+                          options: Dict[str, Any]) -> List[str]:
+    """Tokenize via the raw engine function when possible"""
+    segment = TOKENIZERS.get(engine)
+    if segment is not None and not options:
+        # Same post-processing word_tokenize applies with its defaults
+        # (join_broken_num=True, keep_whitespace=True)
+        return rejoin_formatted_num(segment(text))
+    return word_tokenize(text, engine=engine, **options)
+
+
+# Concurrency caps for the neural engines: uncoordinated parallel torch
+# inference calls fight for the same cores and allocate tensors faster
+# than they compute. ONNX sessions are thread-safe and tolerate modest
+# parallelism, so thai2rom_onnx gets a higher bound
+NEURAL_SEMAPHORES: Dict[str, asyncio.Semaphore] = {
+    e: asyncio.Semaphore(1)
+    for e in ("attacut", "deepcut", "oskut", "sefr_cut",
+              "thai2rom", "thaig2p", "thaig2p_v2")
+}
+NEURAL_SEMAPHORES["thai2rom_onnx"] = asyncio.Semaphore(4)
+
+
+async def _run_engine(engine: str, func, *args) -> Any:
+    """Run an engine call on the executor, capped for neural engines"""
+    loop = asyncio.get_running_loop()
+    sem = NEURAL_SEMAPHORES.get(engine)
+    if sem is None:
+        return await loop.run_in_executor(EXECUTOR, func, *args)
+    async with sem:
+        return await loop.run_in_executor(EXECUTOR, func, *args)
+
+
+class DynamicBatcher:
+    """Coalesce concurrent single-text requests into one engine call
+
+    Requests arriving close together are queued per engine and drained in
+    batches of up to max_batch_size (or whatever accumulates within
+    batch_wait_timeout_s of the first item), then run through the engine
+    in a single executor hop. Engines that release the GIL during
+    segmentation (e.g. nlpo3) parallelize across the batch instead of
+    interleaving N separate calls.
+    """
+
+    def __init__(self, func, max_batch_size: int = 32,
+                 batch_wait_timeout_s: float = 0.002):
+        self._func = func
+        self._max_batch_size = max_batch_size
+        self._batch_wait_timeout_s = batch_wait_timeout_s
+        self._queues: Dict[str, asyncio.Queue] = {}
+        # Strong references: the loop only keeps weak ones, and a worker
+        # collected while blocked on queue.get() would strand its futures
+        self._workers: Dict[str, asyncio.Task] = {}
+
+    async def submit(self, text: str, engine: str,
+                     options: Optional[Dict[str, Any]] = None) -> Any:
+        """Queue one text and wait for its result from the next batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        queue = self._queues.get(engine)
+        if queue is None:
+            queue = asyncio.Queue()
+            self._queues[engine] = queue
+            self._workers[engine] = loop.create_task(
+                self._worker(engine, queue))
+        queue.put_nowait((text, options or {}, future))
+        return await future
+
+    async def _worker(self, engine: str, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block for the first item, then drain whatever else arrives
+            # within the batching window
+            batch = [await queue.get()]
+            deadline = loop.time() + self._batch_wait_timeout_s
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            def run_batch():
+                # Each item fails independently: one bad input must not
+                # turn the rest of the batch into errors
+                outcomes = []
+                for t, o, _ in batch:
+                    try:
+                        outcomes.append((True, self._func(t, engine=engine, **o)))
+                    except Exception as e:
+                        outcomes.append((False, e))
+                return outcomes
+
+            try:
+                outcomes = await _run_engine(engine, run_batch)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, _, future), (ok, value) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+
+# The cached wrappers take positional-only arguments: lru_cache keys
+# positional and keyword calls differently, so allowing both would store
+# the same (text, engine) pair twice and miss across call paths
+@functools.lru_cache(maxsize=100_000)
+def _romanize_cached(text: str, engine: str, /) -> str:
+    """Memoized romanization"""
+    return romanize(text, engine=engine)
+
+
+@functools.lru_cache(maxsize=100_000)
+def _transliterate_cached(text: str, engine: str, /) -> str:
+    """Memoized transliteration"""
+    return transliterate(text, engine=engine)
+
+
+def _romanize_text(text: str, engine: str) -> str:
+    """Romanize whole texts; only short ones are cached to bound memory"""
+    if len(text) < 512:
+        return _romanize_cached(text, engine)
+    return romanize(text, engine=engine)
+
+
+def _transliterate_text(text: str, engine: str) -> str:
+    """Transliterate whole texts; only short ones are cached to bound memory"""
+    if len(text) < 512:
+        return _transliterate_cached(text, engine)
+    return transliterate(text, engine=engine)
+
+
+@functools.lru_cache(maxsize=100_000)
+def _word_tokenize_lru(text: str, engine: str, opts_key: tuple, /) -> List[str]:
+    return _word_tokenize_direct(text, engine, dict(opts_key))
+
+
+def _word_tokenize_cached(text: str, engine: str = "newmm", **options) -> List[str]:
+    """Memoized tokenization; only short texts are cached to bound memory"""
+    if len(text) < 512:
+        try:
+            return _word_tokenize_lru(text, engine,
+                                      tuple(sorted(options.items())))
+        except TypeError:
+            # Unhashable option value - fall through to the direct call
+            pass
+    return _word_tokenize_direct(text, engine, options)
+
+
+def join_romanized(tokens: List[str]) -> str:
+    """Space-join romanized tokens
+
+    Short lists use str.join; for very long documents the tokens are
+    accumulated into a single bytearray written as UTF-8, avoiding the
+    intermediate string allocations str.join makes at that scale.
+    """
+    if len(tokens) <= 1000:
+        return " ".join(tokens)
+    buf = bytearray()
+    first = True
+    for token in tokens:
+        if not first:
+            buf.append(0x20)
+        buf += token.encode('utf-8')
+        first = False
+    return buf.decode('utf-8')
+
+
+def romanize_batch(tokens: List[str], engine: str) -> List[str]:
+    """Romanize a list of tokens in one pass
+
+    Duplicate tokens are served from the LRU cache so only unique tokens
+    reach the engine - a large win for the neural engines (thai2rom,
+    thai2rom_onnx) where per-call tensor setup dominates, and still worth
+    it for the rule-based ones on repetitive text.
+    """
+    return [_romanize_cached(token, engine) for token in tokens]
+
+
+# orjson serializes the nested list-of-strings payloads several times faster
+# than stdlib json; fall back to aiohttp's default when it is unavailable
+try:
+    import orjson
+
+    def ojson(payload: Any, status: int = 200) -> web.Response:
+        """JSON response serialized with orjson"""
+        return web.Response(body=orjson.dumps(payload), status=status,
+                            content_type='application/json')
+
+    async def read_json(request: web.Request) -> Any:
+        """Parse a JSON request body with orjson"""
+        return orjson.loads(await request.read())
+except ImportError:
+    orjson = None
+    print("orjson not available - using stdlib json", file=sys.stderr)
+
+    def ojson(payload: Any, status: int = 200) -> web.Response:
+        return web.json_response(payload, status=status)
+
+    async def read_json(request: web.Request) -> Any:
+        return await request.json()
+
+
+# Frozensets for O(1) engine validation on every request; the lists above
+# are kept for ordered display in /health and error payloads
+TOKENIZE_ENGINES_SET = frozenset(TOKENIZE_ENGINES)
+ROMANIZE_ENGINES_SET = frozenset(ROMANIZE_ENGINES)
+TRANSLITERATE_ENGINES_SET = frozenset(TRANSLITERATE_ENGINES)
+SYLLABLE_ENGINES_SET = frozenset(SYLLABLE_ENGINES)
+
+
+def _static_body(payload: Dict[str, Any]) -> bytes:
+    """Serialize a payload once at module load"""
+    return orjson.dumps(payload) if orjson else json.dumps(payload).encode()
+
+
+def _error_body(code: str, message: str,
+                details: Optional[Dict[str, Any]] = None) -> bytes:
+    error = {"code": code, "message": message}
+    if details is not None:
+        error["details"] = details
+    return _static_body({"data": None, "metadata": {}, "error": error})
+
+
+# Pre-serialized bodies for the static reject paths; bad requests cost a
+# memcpy instead of dict construction plus JSON serialization
+EMPTY_TEXT_BODY = _error_body(
+    "EMPTY_TEXT", "Text parameter is required")
+EMPTY_TEXTS_BODY = _error_body(
+    "EMPTY_TEXTS", "Texts parameter must be a non-empty list")
+INVALID_TOKENIZE_ENGINE_BODY = _error_body(
+    "INVALID_ENGINE", "Requested engine not supported",
+    {"supported_engines": TOKENIZE_ENGINES})
+INVALID_ROMANIZE_ENGINE_BODY = _error_body(
+    "INVALID_ENGINE", "Requested engine not supported",
+    {"supported_engines": ROMANIZE_ENGINES})
+INVALID_TRANSLITERATE_ENGINE_BODY = _error_body(
+    "INVALID_ENGINE", "Requested engine not supported",
+    {"supported_engines": TRANSLITERATE_ENGINES})
+INVALID_SYLLABLE_ENGINE_BODY = _error_body(
+    "INVALID_ENGINE", "Requested engine not supported",
+    {"supported_engines": SYLLABLE_ENGINES})
+
+HEALTH_BODY = _static_body({
+    "status": "ready",
+    "version": pythainlp_version,
+    "engines": {
+        "tokenize": TOKENIZE_ENGINES,
+        "romanize": ROMANIZE_ENGINES,
+        "transliterate": TRANSLITERATE_ENGINES,
+        "syllable": SYLLABLE_ENGINES
+    }
+})
+HEALTH_ETAG = hashlib.blake2b(HEALTH_BODY, digest_size=8).hexdigest()
+
+
+def static_response(body: bytes, status: int = 200) -> web.Response:
+    """Response built from a pre-serialized JSON body"""
+    return web.Response(body=body, status=status,
+                        content_type='application/json')
+
+
+# Transliterate engines that tokenize internally and whose output composes
+# cleanly from per-token calls; /analyze feeds these its precomputed tokens
+TOKEN_TRANSLITERATE_ENGINES = {"thaig2p", "tltk_ipa"}
+
+# Shared thread pool for engine calls so handlers never block the event
+# loop; Rust-backed engines release the GIL, so this yields real parallelism
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# One batcher per engine family; each keeps its own per-engine queues.
+# The cached wrappers sit in front so repeated inputs skip the engine.
+TOKENIZE_BATCHER = DynamicBatcher(_word_tokenize_cached)
+ROMANIZE_BATCHER = DynamicBatcher(_romanize_text)
+TRANSLITERATE_BATCHER = DynamicBatcher(_transliterate_text)
+SYLLABLE_BATCHER = DynamicBatcher(syllable_tokenize)
+
 
 async def handle_tokenize(request: web.Request) -> web.Response:
     """Handle tokenization requests"""
     try:
-        data = await request.json()
+        data = await read_json(request)
         text = data.get("text", "")
-        engine = data.get("engine", "newmm")
+        engine = data.get("engine", DEFAULT_TOKENIZE_ENGINE)
         options = data.get("options", {})
         
         if not text:
-            return web.json_response({
-                "data": None,
-                "metadata": {},
-                "error": {
-                    "code": "EMPTY_TEXT",
-                    "message": "Text parameter is required"
-                }
-            }, status=400)
+            return static_response(EMPTY_TEXT_BODY, status=400)
         
-        if engine not in TOKENIZE_ENGINES:
-            return web.json_response({
-                "data": None,
-                "metadata": {},
-                "error": {
-                    "code": "INVALID_ENGINE",
-                    "message": f"Engine '{engine}' not supported",
-                    "details": {"supported_engines": TOKENIZE_ENGINES}
-                }
-            }, status=400)
+        if engine not in TOKENIZE_ENGINES_SET:
+            return static_response(INVALID_TOKENIZE_ENGINE_BODY, status=400)
         
         start = time.time()
-        tokens = word_tokenize(text, engine=engine, **options)
+        tokens = await TOKENIZE_BATCHER.submit(text, engine, options)
         processing_time = (time.time() - start) * 1000
         
-        return web.json_response({
+        return ojson({
             "data": {
                 "tokens": tokens
             },
@@ -169,13 +589,62 @@ async def handle_tokenize(request: web.Request) -> web.Response:
         })
         
     except Exception as e:
-        return web.json_response({
+        log.exception("handler failed")
+        return ojson({
             "data": None,
             "metadata": {},
             "error": {
                 "code": "INTERNAL_ERROR",
-                "message": str(e),
-                "details": {"traceback": traceback.format_exc()}
+                "message": str(e)
+            }
+        }, status=500)
+
+
+async def handle_tokenize_batch(request: web.Request) -> web.Response:
+    """Handle batched tokenization requests (many texts, one response)"""
+    try:
+        data = await read_json(request)
+        texts = data.get("texts", [])
+        engine = data.get("engine", DEFAULT_TOKENIZE_ENGINE)
+        options = data.get("options", {})
+
+        if not texts or not isinstance(texts, list):
+            return static_response(EMPTY_TEXTS_BODY, status=400)
+
+        if engine not in TOKENIZE_ENGINES_SET:
+            return static_response(INVALID_TOKENIZE_ENGINE_BODY, status=400)
+
+        start = time.time()
+        # Run the whole batch off the event loop; one executor hop amortizes
+        # JSON/dispatch overhead over all texts
+        results = await _run_engine(
+            engine,
+            lambda: [_word_tokenize_cached(t, engine=engine, **options)
+                     for t in texts]
+        )
+        processing_time = (time.time() - start) * 1000
+
+        return ojson({
+            "data": {
+                "results": [{"tokens": r, "count": len(r)} for r in results]
+            },
+            "metadata": {
+                "engine": engine,
+                "version": pythainlp_version,
+                "batch_size": len(texts),
+                "processing_time_ms": round(processing_time, 2)
+            },
+            "error": None
+        })
+
+    except Exception as e:
+        log.exception("handler failed")
+        return ojson({
+            "data": None,
+            "metadata": {},
+            "error": {
+                "code": "INTERNAL_ERROR",
+                "message": str(e)
             }
         }, status=500)
 
@@ -183,50 +652,40 @@ async def handle_tokenize(request: web.Request) -> web.Response:
 async def handle_romanize(request: web.Request) -> web.Response:
     """Handle romanization requests"""
     try:
-        data = await request.json()
+        data = await read_json(request)
         text = data.get("text", "")
         engine = data.get("engine", "royin")
         
         if not text:
-            return web.json_response({
-                "data": None,
-                "metadata": {},
-                "error": {
-                    "code": "EMPTY_TEXT",
-                    "message": "Text parameter is required"
-                }
-            }, status=400)
+            return static_response(EMPTY_TEXT_BODY, status=400)
         
-        if engine not in ROMANIZE_ENGINES:
-            return web.json_response({
-                "data": None,
-                "metadata": {},
-                "error": {
-                    "code": "INVALID_ENGINE",
-                    "message": f"Engine '{engine}' not supported",
-                    "details": {"supported_engines": ROMANIZE_ENGINES}
-                }
-            }, status=400)
+        if engine not in ROMANIZE_ENGINES_SET:
+            return static_response(INVALID_ROMANIZE_ENGINE_BODY, status=400)
         
         start = time.time()
         
         # Tokenize first if requested
         if data.get("tokenize", False):
-            tokens = word_tokenize(text)
-            romanized_tokens = [romanize(token, engine=engine) for token in tokens]
-            romanized_text = " ".join(romanized_tokens)
+            tokens = await _run_engine(
+                DEFAULT_TOKENIZE_ENGINE,
+                functools.partial(_word_tokenize_cached, text,
+                                  engine=DEFAULT_TOKENIZE_ENGINE)
+            )
+            romanized_tokens = await _run_engine(
+                engine, romanize_batch, tokens, engine)
+            romanized_text = join_romanized(romanized_tokens)
             result = {
                 "romanized": romanized_text,
                 "tokens": tokens,
                 "romanized_tokens": romanized_tokens
             }
         else:
-            romanized_text = romanize(text, engine=engine)
+            romanized_text = await ROMANIZE_BATCHER.submit(text, engine)
             result = {"romanized": romanized_text}
         
         processing_time = (time.time() - start) * 1000
         
-        return web.json_response({
+        return ojson({
             "data": result,
             "metadata": {
                 "engine": engine,
@@ -237,13 +696,58 @@ async def handle_romanize(request: web.Request) -> web.Response:
         })
         
     except Exception as e:
-        return web.json_response({
+        log.exception("handler failed")
+        return ojson({
             "data": None,
             "metadata": {},
             "error": {
                 "code": "INTERNAL_ERROR",
-                "message": str(e),
-                "details": {"traceback": traceback.format_exc()}
+                "message": str(e)
+            }
+        }, status=500)
+
+
+async def handle_romanize_batch(request: web.Request) -> web.Response:
+    """Handle batched romanization requests (many texts, one response)"""
+    try:
+        data = await read_json(request)
+        texts = data.get("texts", [])
+        engine = data.get("engine", "royin")
+
+        if not texts or not isinstance(texts, list):
+            return static_response(EMPTY_TEXTS_BODY, status=400)
+
+        if engine not in ROMANIZE_ENGINES_SET:
+            return static_response(INVALID_ROMANIZE_ENGINE_BODY, status=400)
+
+        start = time.time()
+        results = await _run_engine(
+            engine,
+            lambda: [_romanize_text(t, engine) for t in texts]
+        )
+        processing_time = (time.time() - start) * 1000
+
+        return ojson({
+            "data": {
+                "results": [{"romanized": r} for r in results]
+            },
+            "metadata": {
+                "engine": engine,
+                "version": pythainlp_version,
+                "batch_size": len(texts),
+                "processing_time_ms": round(processing_time, 2)
+            },
+            "error": None
+        })
+
+    except Exception as e:
+        log.exception("handler failed")
+        return ojson({
+            "data": None,
+            "metadata": {},
+            "error": {
+                "code": "INTERNAL_ERROR",
+                "message": str(e)
             }
         }, status=500)
 
@@ -251,36 +755,21 @@ async def handle_romanize(request: web.Request) -> web.Response:
 async def handle_transliterate(request: web.Request) -> web.Response:
     """Handle transliteration (phonetic) requests"""
     try:
-        data = await request.json()
+        data = await read_json(request)
         text = data.get("text", "")
         engine = data.get("engine", "thaig2p")
         
         if not text:
-            return web.json_response({
-                "data": None,
-                "metadata": {},
-                "error": {
-                    "code": "EMPTY_TEXT",
-                    "message": "Text parameter is required"
-                }
-            }, status=400)
+            return static_response(EMPTY_TEXT_BODY, status=400)
         
-        if engine not in TRANSLITERATE_ENGINES:
-            return web.json_response({
-                "data": None,
-                "metadata": {},
-                "error": {
-                    "code": "INVALID_ENGINE",
-                    "message": f"Engine '{engine}' not supported",
-                    "details": {"supported_engines": TRANSLITERATE_ENGINES}
-                }
-            }, status=400)
+        if engine not in TRANSLITERATE_ENGINES_SET:
+            return static_response(INVALID_TRANSLITERATE_ENGINE_BODY, status=400)
         
         start = time.time()
-        phonetic = transliterate(text, engine=engine)
+        phonetic = await TRANSLITERATE_BATCHER.submit(text, engine)
         processing_time = (time.time() - start) * 1000
         
-        return web.json_response({
+        return ojson({
             "data": {
                 "phonetic": phonetic
             },
@@ -293,13 +782,58 @@ async def handle_transliterate(request: web.Request) -> web.Response:
         })
         
     except Exception as e:
-        return web.json_response({
+        log.exception("handler failed")
+        return ojson({
+            "data": None,
+            "metadata": {},
+            "error": {
+                "code": "INTERNAL_ERROR",
+                "message": str(e)
+            }
+        }, status=500)
+
+
+async def handle_transliterate_batch(request: web.Request) -> web.Response:
+    """Handle batched transliteration requests (many texts, one response)"""
+    try:
+        data = await read_json(request)
+        texts = data.get("texts", [])
+        engine = data.get("engine", "thaig2p")
+
+        if not texts or not isinstance(texts, list):
+            return static_response(EMPTY_TEXTS_BODY, status=400)
+
+        if engine not in TRANSLITERATE_ENGINES_SET:
+            return static_response(INVALID_TRANSLITERATE_ENGINE_BODY, status=400)
+
+        start = time.time()
+        results = await _run_engine(
+            engine,
+            lambda: [_transliterate_text(t, engine) for t in texts]
+        )
+        processing_time = (time.time() - start) * 1000
+
+        return ojson({
+            "data": {
+                "results": [{"phonetic": r} for r in results]
+            },
+            "metadata": {
+                "engine": engine,
+                "version": pythainlp_version,
+                "batch_size": len(texts),
+                "processing_time_ms": round(processing_time, 2)
+            },
+            "error": None
+        })
+
+    except Exception as e:
+        log.exception("handler failed")
+        return ojson({
             "data": None,
             "metadata": {},
             "error": {
                 "code": "INTERNAL_ERROR",
-                "message": str(e),
-                "details": {"traceback": traceback.format_exc()}
+                "message": str(e)
             }
         }, status=500)
 
@@ -307,37 +841,23 @@ async def handle_transliterate(request: web.Request) -> web.Response:
 async def handle_syllable_tokenize(request: web.Request) -> web.Response:
     """Handle syllable tokenization requests"""
     try:
-        data = await request.json()
+        data = await read_json(request)
         text = data.get("text", "")
         engine = data.get("engine", "han_solo")  # Default engine
         keep_whitespace = data.get("keep_whitespace", True)
         
         if not text:
-            return web.json_response({
-                "data": None,
-                "metadata": {},
-                "error": {
-                    "code": "EMPTY_TEXT",
-                    "message": "Text parameter is required"
-                }
-            }, status=400)
+            return static_response(EMPTY_TEXT_BODY, status=400)
         
-        if engine not in SYLLABLE_ENGINES:
-            return web.json_response({
-                "data": None,
-                "metadata": {},
-                "error": {
-                    "code": "INVALID_ENGINE",
-                    "message": f"Engine '{engine}' not supported",
-                    "details": {"supported_engines": SYLLABLE_ENGINES}
-                }
-            }, status=400)
+        if engine not in SYLLABLE_ENGINES_SET:
+            return static_response(INVALID_SYLLABLE_ENGINE_BODY, status=400)
         
         start = time.time()
-        syllables = syllable_tokenize(text, engine=engine, keep_whitespace=keep_whitespace)
+        syllables = await SYLLABLE_BATCHER.submit(
+            text, engine, {"keep_whitespace": keep_whitespace})
         processing_time = (time.time() - start) * 1000
         
-        return web.json_response({
+        return ojson({
             "data": {
                 "syllables": syllables
             },
@@ -350,59 +870,157 @@ async def handle_syllable_tokenize(request: web.Request) -> web.Response:
         })
         
     except Exception as e:
-        return web.json_response({
+        log.exception("handler failed")
+        return ojson({
             "data": None,
             "metadata": {},
             "error": {
                 "code": "INTERNAL_ERROR",
-                "message": str(e),
-                "details": {"traceback": traceback.format_exc()}
+                "message": str(e)
             }
         }, status=500)
 
 
+async def _analyze_stream(request: web.Request, text: str,
+                          features: List[str],
+                          data: Dict[str, Any]) -> web.StreamResponse:
+    """Stream per-sentence analyze results as NDJSON
+
+    Long documents are split on sentence boundaries and each sentence is
+    processed and flushed as soon as it is ready, so first-byte latency
+    and peak memory stay flat regardless of document size.
+    """
+    loop = asyncio.get_running_loop()
+    tokenize_engine = data.get("tokenize_engine", DEFAULT_TOKENIZE_ENGINE)
+    romanize_engine = data.get("romanize_engine", "royin")
+    transliterate_engine = data.get("transliterate_engine", "thaig2p")
+    syllable_engine = data.get("syllable_engine", "han_solo")
+
+    resp = web.StreamResponse(
+        headers={'Content-Type': 'application/x-ndjson'})
+    await resp.prepare(request)
+
+    # Once the headers are out, errors must not escape to handle_analyze:
+    # a second JSON response on this connection would be written into the
+    # chunked body and corrupt the stream. Terminate with an error line
+    # instead
+    try:
+        sentences = await loop.run_in_executor(EXECUTOR, sent_tokenize, text)
+        for i, sentence in enumerate(sentences):
+            chunk: Dict[str, Any] = {"sentence_idx": i, "sentence": sentence}
+            tokens = await _run_engine(
+                tokenize_engine,
+                functools.partial(_word_tokenize_cached, sentence,
+                                  engine=tokenize_engine)
+            )
+            if "tokenize" in features:
+                chunk["tokens"] = tokens
+            if "romanize" in features:
+                romanized_tokens = await _run_engine(
+                    romanize_engine, romanize_batch, tokens, romanize_engine)
+                chunk["romanized"] = " ".join(romanized_tokens)
+                chunk["romanized_tokens"] = romanized_tokens
+            if "transliterate" in features:
+                chunk["phonetic"] = await _run_engine(
+                    transliterate_engine, _transliterate_text, sentence,
+                    transliterate_engine)
+            if "syllable" in features:
+                chunk["syllables"] = await _run_engine(
+                    syllable_engine,
+                    functools.partial(syllable_tokenize, sentence,
+                                      engine=syllable_engine))
+
+            if orjson:
+                body = orjson.dumps(chunk)
+            else:
+                body = json.dumps(chunk, ensure_ascii=False).encode('utf-8')
+            await resp.write(body + b"\n")
+    except Exception as e:
+        log.exception("analyze stream failed")
+        error_line = {"error": {"code": "INTERNAL_ERROR", "message": str(e)}}
+        if orjson:
+            body = orjson.dumps(error_line)
+        else:
+            body = json.dumps(error_line, ensure_ascii=False).encode('utf-8')
+        await resp.write(body + b"\n")
+
+    await resp.write_eof()
+    return resp
+
+
 async def handle_analyze(request: web.Request) -> web.Response:
     """Handle combined analysis requests"""
     try:
-        data = await request.json()
+        data = await read_json(request)
         text = data.get("text", "")
         features = data.get("features", ["tokenize", "romanize"])
-        
+
         if not text:
-            return web.json_response({
-                "data": None,
-                "metadata": {},
-                "error": {
-                    "code": "EMPTY_TEXT",
-                    "message": "Text parameter is required"
-                }
-            }, status=400)
-        
+            return static_response(EMPTY_TEXT_BODY, status=400)
+
+        # Streaming mode: flush per-sentence chunks instead of buffering
+        # the whole result for large documents
+        if request.headers.get('Accept') == 'application/x-ndjson':
+            return await _analyze_stream(request, text, features, data)
+
         start = time.time()
         result = {}
-        
+
         # Always tokenize first as base
-        tokens = word_tokenize(text, engine=data.get("tokenize_engine", "newmm"))
+        tokenize_engine = data.get("tokenize_engine", DEFAULT_TOKENIZE_ENGINE)
+        tokens = await _run_engine(
+            tokenize_engine,
+            functools.partial(_word_tokenize_cached, text,
+                              engine=tokenize_engine)
+        )
         if "tokenize" in features:
             result["tokens"] = tokens
-        
+
+        # The remaining features only depend on tokens/text, not on each
+        # other, so they run concurrently on separate executor threads
+        tasks: Dict[str, Any] = {}
+
         if "romanize" in features:
             engine = data.get("romanize_engine", "royin")
-            romanized_tokens = [romanize(token, engine=engine) for token in tokens]
-            result["romanized"] = " ".join(romanized_tokens)
-            result["romanized_tokens"] = romanized_tokens
-        
+            tasks["romanize"] = _run_engine(
+                engine, romanize_batch, tokens, engine)
+
         if "transliterate" in features:
             engine = data.get("transliterate_engine", "thaig2p")
-            result["phonetic"] = transliterate(text, engine=engine)
-        
+            if engine in TOKEN_TRANSLITERATE_ENGINES:
+                # Feed the precomputed tokens instead of the raw text so
+                # the engine does not tokenize the whole document again;
+                # per-token calls also hit the transliterate cache.
+                # word_tokenize keeps whitespace tokens by default - skip
+                # them rather than asking a g2p engine to pronounce " "
+                tasks["transliterate"] = _run_engine(
+                    engine,
+                    lambda e=engine: " ".join(_transliterate_cached(t, e)
+                                              for t in tokens if t.strip()))
+            else:
+                tasks["transliterate"] = _run_engine(
+                    engine, _transliterate_text, text, engine)
+
         if "syllable" in features:
             engine = data.get("syllable_engine", "han_solo")
-            result["syllables"] = syllable_tokenize(text, engine=engine)
+            tasks["syllable"] = _run_engine(
+                engine, functools.partial(syllable_tokenize, text, engine=engine))
+
+        if tasks:
+            done = dict(zip(tasks.keys(),
+                            await asyncio.gather(*tasks.values())))
+            if "romanize" in done:
+                romanized_tokens = done["romanize"]
+                result["romanized"] = " ".join(romanized_tokens)
+                result["romanized_tokens"] = romanized_tokens
+            if "transliterate" in done:
+                result["phonetic"] = done["transliterate"]
+            if "syllable" in done:
+                result["syllables"] = done["syllable"]
         
         processing_time = (time.time() - start) * 1000
         
-        return web.json_response({
+        return ojson({
             "data": result,
             "metadata": {
                 "features": features,
@@ -413,47 +1031,117 @@ async def handle_analyze(request: web.Request) -> web.Response:
         })
         
     except Exception as e:
-        return web.json_response({
+        log.exception("handler failed")
+        return ojson({
             "data": None,
             "metadata": {},
             "error": {
                 "code": "INTERNAL_ERROR",
-                "message": str(e),
-                "details": {"traceback": traceback.format_exc()}
+                "message": str(e)
             }
         }, status=500)
 
 
+async def handle_cache_stats(request: web.Request) -> web.Response:
+    """Report LRU cache hit rates for monitoring"""
+    def info(cache) -> Dict[str, int]:
+        i = cache.cache_info()
+        return {"hits": i.hits, "misses": i.misses,
+                "maxsize": i.maxsize, "currsize": i.currsize}
+
+    return ojson({
+        "tokenize": info(_word_tokenize_lru),
+        "romanize": info(_romanize_cached),
+        "transliterate": info(_transliterate_cached)
+    })
+
+
 async def handle_health(request: web.Request) -> web.Response:
     """Health check endpoint"""
-    return web.json_response({
-        "status": "ready",
-        "version": pythainlp_version,
-        "engines": {
-            "tokenize": TOKENIZE_ENGINES,
-            "romanize": ROMANIZE_ENGINES,
-            "transliterate": TRANSLITERATE_ENGINES,
-            "syllable": SYLLABLE_ENGINES
-        }
-    })
+    # Engine registries never change at runtime, so the body and its ETag
+    # are computed once at module load; probers that replay the ETag get
+    # a bodyless 304
+    if request.headers.get('If-None-Match') == HEALTH_ETAG:
+        return web.Response(status=304, headers={'ETag': HEALTH_ETAG})
+    return web.Response(body=HEALTH_BODY, content_type='application/json',
+                        headers={'ETag': HEALTH_ETAG})
 
 
 def create_app() -> web.Application:
     """Create and configure the web application"""
-    app = web.Application()
+    # Raised body limit: Thai documents sent for analysis can be large
+    app = web.Application(client_max_size=16 * 1024 * 1024)
     
     # Add routes
     app.router.add_post('/tokenize', handle_tokenize)
+    app.router.add_post('/tokenize/batch', handle_tokenize_batch)
     app.router.add_post('/romanize', handle_romanize)
+    app.router.add_post('/romanize/batch', handle_romanize_batch)
     app.router.add_post('/transliterate', handle_transliterate)
+    app.router.add_post('/transliterate/batch', handle_transliterate_batch)
     app.router.add_post('/syllable_tokenize', handle_syllable_tokenize)
     app.router.add_post('/analyze', handle_analyze)
     app.router.add_get('/health', handle_health)
+    app.router.add_get('/cache/stats', handle_cache_stats)
     
     return app
 
 
-if __name__ == '__main__':
+async def run_server(port: int) -> None:
+    """Run the app on an explicitly configured runner
+
+    Long keepalive keeps the Go client's pooled connections warm, and the
+    large accept backlog plus SO_REUSEPORT avoid connection drops under
+    bursty traffic. Clients draining large responses should raise their
+    read buffer (aiohttp read_bufsize=4*1024*1024) to match.
+    """
     app = create_app()
-    print("Starting PyThaiNLP HTTP service on port __PYTHAINLP_SERVICE_PORT__...", file=sys.stderr)
-    web.run_app(app, host='0.0.0.0', port=__PYTHAINLP_SERVICE_PORT__)
\ No newline at end of file
+    runner = web.AppRunner(app, keepalive_timeout=75)
+    await runner.setup()
+    site = web.TCPSite(runner, '0.0.0.0', port, backlog=2048, reuse_port=True)
+    await site.start()
+    # aiohttp serves on this loop; just keep it alive
+    while True:
+        await asyncio.sleep(3600)
+
+
+def run_worker(port: int) -> None:
+    """Entry point for one server process
+
+    Engine warmup runs here, after any fork, because torch/OpenMP thread
+    pools and ONNX sessions created in a parent do not survive fork and
+    can deadlock inherited workers.
+    """
+    warmup_engines()
+    # uvloop cuts per-request event-loop dispatch cost; stock asyncio is the
+    # fallback on platforms where it is unavailable
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        print("uvloop not available - using default asyncio loop", file=sys.stderr)
+    asyncio.run(run_server(port))
+
+
+if __name__ == '__main__':
+    port = __PYTHAINLP_SERVICE_PORT__
+    # Multi-process mode is opt-in: each extra worker warms its own copy
+    # of every engine, which multiplies startup time and memory
+    workers = int(os.environ.get('WORKERS', 1))
+    print(f"Starting PyThaiNLP HTTP service on port {port} "
+          f"with {workers} worker(s)...", file=sys.stderr)
+    if workers <= 1:
+        run_worker(port)
+    else:
+        # All children bind the same port with SO_REUSEPORT (set in
+        # run_server) and the kernel balances connections across them.
+        # fork shares the imported modules copy-on-write; each child then
+        # warms its engines itself in run_worker
+        import multiprocessing
+        ctx = multiprocessing.get_context('fork')
+        procs = [ctx.Process(target=run_worker, args=(port,))
+                 for _ in range(workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
\ No newline at end of file